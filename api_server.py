@@ -7,10 +7,26 @@ Vault Token 기반 인증 API 서버 with Token Management UI
 3. 서버 자체 토큰(RENEWAL_TOKEN)을 자동으로 갱신
 """
 
-from flask import Flask, request, jsonify, render_template_string
+from flask import Flask, Response, request, jsonify, render_template_string, stream_with_context
+from werkzeug.serving import make_server
+from cryptography.fernet import Fernet, InvalidToken
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+from array import array
 import requests
 import os
 import sys
+import json
+import hmac
+import atexit
+import signal
+import math
+import heapq
+import bisect
+import hashlib
+import itertools
+import secrets
+import queue
 import threading
 import time
 from datetime import datetime
@@ -24,6 +40,61 @@ RENEWAL_TOKEN = os.getenv('RENEWAL_TOKEN', 'RENEWAL_TOKEN')
 
 VAULT_TOKEN_PREFIX = "hvs."
 
+# 토큰 검증 결과 캐시 유지 시간(초), 0이면 캐시를 사용하지 않음
+VERIFY_CACHE_TTL = int(os.getenv('VERIFY_CACHE_TTL', '0'))
+# 검증 캐시 스냅샷 파일 경로 (비어 있으면 스냅샷을 사용하지 않음)
+VERIFY_CACHE_SNAPSHOT_PATH = os.getenv('VERIFY_CACHE_SNAPSHOT_PATH', '')
+# 스냅샷 암호화 키 (Fernet 키, 없으면 스냅샷을 저장하지 않음)
+VERIFY_CACHE_SNAPSHOT_KEY = os.getenv('VERIFY_CACHE_SNAPSHOT_KEY', '')
+# 스냅샷 저장 주기(초)
+VERIFY_CACHE_SNAPSHOT_INTERVAL = int(os.getenv('VERIFY_CACHE_SNAPSHOT_INTERVAL', '60'))
+
+# 관리자 API 인증 키 (Admin-Key 헤더), 비어 있으면 관리자 API 비활성화
+ADMIN_API_KEY = os.getenv('ADMIN_API_KEY', '')
+# 토큰 인벤토리 조회 시 동시에 보내는 Vault lookup 요청 수
+INVENTORY_CONCURRENCY = int(os.getenv('INVENTORY_CONCURRENCY', '8'))
+# 일괄 폐기 시 동시에 보내는 Vault revoke 요청 수
+REVOKE_CONCURRENCY = int(os.getenv('REVOKE_CONCURRENCY', '8'))
+
+# readiness probe의 Vault 상태 확인 주기(초)
+READINESS_PROBE_INTERVAL = int(os.getenv('READINESS_PROBE_INTERVAL', '10'))
+# 마지막 확인 결과가 이 시간(초)보다 오래되면 준비되지 않은 것으로 판단
+READINESS_STALE_AFTER = int(os.getenv('READINESS_STALE_AFTER', '30'))
+
+# Idempotency-Key 결과 보관 시간(초)과 최대 보관 개수
+IDEMPOTENCY_TTL = int(os.getenv('IDEMPOTENCY_TTL', '3600'))
+IDEMPOTENCY_MAX_KEYS = int(os.getenv('IDEMPOTENCY_MAX_KEYS', '10000'))
+# 같은 키로 처리 중인 요청을 기다리는 최대 시간(초)
+IDEMPOTENCY_WAIT_TIMEOUT = int(os.getenv('IDEMPOTENCY_WAIT_TIMEOUT', '10'))
+
+# 발급 토큰 인덱스 로그 파일 경로 (비어 있으면 메모리에만 보관)
+TOKEN_INDEX_PATH = os.getenv('TOKEN_INDEX_PATH', '')
+# 인덱스 로그 압축 주기(초)
+TOKEN_INDEX_COMPACT_INTERVAL = int(os.getenv('TOKEN_INDEX_COMPACT_INTERVAL', '300'))
+
+# /api/data 사용량 집계 사용 여부 (1: 사용, 0: 사용 안 함)
+USAGE_ANALYTICS = os.getenv('USAGE_ANALYTICS', '1') == '1'
+# 사용량 집계 구간 길이(초)
+USAGE_WINDOW = int(os.getenv('USAGE_WINDOW', '60'))
+# 상위 토큰/클라이언트 보관 개수
+USAGE_TOP_K = int(os.getenv('USAGE_TOP_K', '20'))
+
+# 백그라운드 토큰 생성 작업 워커 수 / 작업당 최대 생성 개수
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '2'))
+JOB_MAX_COUNT = int(os.getenv('JOB_MAX_COUNT', '10000'))
+# 동시에 대기/진행 중일 수 있는 최대 작업 수
+JOB_MAX_PENDING = int(os.getenv('JOB_MAX_PENDING', '10'))
+# 작업이 Vault에 보내는 초당 최대 토큰 생성 요청 수 (모든 작업 합계)
+JOB_VAULT_QPS = float(os.getenv('JOB_VAULT_QPS', '20'))
+# 작업 체크포인트 로그 경로와 암호화 키 (Fernet 키, 둘 다 있어야 재시작 후 이어서 처리)
+JOB_CHECKPOINT_PATH = os.getenv('JOB_CHECKPOINT_PATH', '')
+JOB_CHECKPOINT_KEY = os.getenv('JOB_CHECKPOINT_KEY', '')
+# 완료된 작업 결과 보관 시간(초)
+JOB_RETENTION = int(os.getenv('JOB_RETENTION', '86400'))
+
+# 권한 이름 -> 인덱스에 저장하는 비트마스크 값
+PERMISSION_BITS = {'create': 1, 'read': 2, 'update': 4, 'delete': 8, 'list': 16}
+
 
 # 로깅 설정
 import logging
@@ -37,6 +108,52 @@ logger = logging.getLogger(__name__)
 current_token = RENEWAL_TOKEN
 token_lock = threading.Lock()
 
+# 전역 변수: 토큰 검증 캐시 (토큰 해시 -> (캐시 만료 시각, 토큰 만료 시각, 축약 정보))
+verify_cache = {}
+verify_cache_lock = threading.Lock()
+# 전역 변수: 최근 폐기된 토큰 해시/accessor -> 폐기 시각 (verify_cache_lock으로 보호)
+# 폐기 전에 시작된 lookup이 폐기 후에 결과를 캐시에 다시 쓰지 못하도록 막는 용도
+revocation_tombstones = {}
+# tombstone 유지 시간(초) - Vault lookup 타임아웃(5초)보다 충분히 길게
+REVOCATION_TOMBSTONE_TTL = 60
+# 스냅샷 저장 직렬화 - 폐기 직후 저장한 스냅샷을 그 전에 읽은 캐시로 덮어쓰지 않도록 읽기~쓰기 전체를 보호
+verify_cache_snapshot_lock = threading.Lock()
+
+# 전역 변수: 백그라운드에서 확인한 준비 상태 (/readyz는 이 값만 읽음)
+readiness_state = {
+    'vault_ok': False,
+    'vault_checked_at': 0,
+    'token_ok': False,
+    'token_ttl': 0,
+    'token_checked_at': 0
+}
+readiness_lock = threading.Lock()
+
+# 전역 변수: Idempotency-Key -> 토큰 생성 처리 상태 (삽입 순서 = 만료 순서)
+idempotency_store = OrderedDict()
+idempotency_lock = threading.Lock()
+
+# 전역 변수: 발급 토큰 인덱스
+token_index = {}                                                 # accessor -> 레코드
+token_index_names = []                                           # (display_name, accessor) 정렬 목록
+token_index_by_permission = {name: set() for name in PERMISSION_BITS}  # 권한 -> accessor 집합
+token_index_hashes = {}                                          # 토큰 해시 -> accessor
+token_index_lock = threading.Lock()
+
+# 전역 변수: 사용량 집계 (현재 구간, 직전 구간)
+usage_window = None
+previous_usage_window = None
+usage_lock = threading.Lock()
+
+# 전역 변수: 백그라운드 토큰 생성 작업 (작업 ID -> 작업), 대기 큐, 워커 스레드
+token_jobs = {}
+token_jobs_cond = threading.Condition()
+token_job_queue = queue.Queue()
+token_job_workers = []
+# 다음 Vault 생성 요청을 보낼 수 있는 시각 (JOB_VAULT_QPS 간격)
+job_next_slot = 0.0
+job_rate_lock = threading.Lock()
+
 def strip_vault_prefix(token: str) -> str:
     """hvs. 접두사 제거 (UI 표시용)"""
     if token.startswith(VAULT_TOKEN_PREFIX):
@@ -50,15 +167,16 @@ def attach_vault_prefix(token: str) -> str:
     return token
 
 
-def get_token_info(token):
+def lookup_self(token):
     """
-    RENEWAL_TOKEN의 상세 정보를 조회
+    토큰 lookup-self 조회 (연결 실패와 Vault의 거부 응답을 구분)
     
     Args:
         token (str): 조회할 Vault 토큰
         
     Returns:
-        dict or None: 토큰 정보 또는 None (실패 시)
+        tuple: (token_info: dict or None, status_code: int or None)
+            - 연결 실패/타임아웃이면 status_code는 None
     """
     try:
         response = requests.get(
@@ -68,11 +186,24 @@ def get_token_info(token):
         )
         
         if response.status_code == 200:
-            return response.json()['data']
-        return None
+            return response.json()['data'], 200
+        return None, response.status_code
     except Exception as e:
         logger.error(f"토큰 정보 조회 실패: {e}")
-        return None
+        return None, None
+
+
+def get_token_info(token):
+    """
+    RENEWAL_TOKEN의 상세 정보를 조회
+    
+    Args:
+        token (str): 조회할 Vault 토큰
+        
+    Returns:
+        dict or None: 토큰 정보 또는 None (실패 시)
+    """
+    return lookup_self(token)[0]
 
 
 def renew_token(token):
@@ -104,6 +235,90 @@ def renew_token(token):
         return False
 
 
+def check_vault_health():
+    """
+    Vault sys/health 확인 (standby 노드도 정상으로 판단)
+    
+    Returns:
+        bool: Vault가 요청을 처리할 수 있는 상태인지 여부
+    """
+    try:
+        response = requests.get(
+            f'{VAULT_ADDR}/v1/sys/health',
+            params={'standbyok': 'true', 'perfstandbyok': 'true'},
+            timeout=5
+        )
+        return response.status_code == 200
+    except Exception as e:
+        logger.error(f"System - Vault 상태 확인 실패: {e}")
+        return False
+
+
+def record_vault_health(vault_ok):
+    """Vault 상태 확인 결과를 readiness_state에 기록"""
+    with readiness_lock:
+        readiness_state['vault_ok'] = vault_ok
+        readiness_state['vault_checked_at'] = time.time()
+
+
+def record_renewal_token_state(token_info):
+    """RENEWAL_TOKEN 조회 결과를 readiness_state에 기록 (None이면 사용 불가)"""
+    with readiness_lock:
+        readiness_state['token_ok'] = token_info is not None
+        readiness_state['token_ttl'] = token_info.get('ttl', 0) if token_info else 0
+        readiness_state['token_checked_at'] = time.time()
+
+
+def readiness_probe_worker():
+    """
+    백그라운드 스레드에서 READINESS_PROBE_INTERVAL마다 Vault 상태를 확인하는 워커
+    RENEWAL_TOKEN 상태는 token_renewal_worker()가 기록
+    """
+    logger.info("readiness probe 워커 시작")
+    
+    while True:
+        vault_ok = check_vault_health()
+        with readiness_lock:
+            changed = readiness_state['vault_ok'] != vault_ok or not readiness_state['vault_checked_at']
+        record_vault_health(vault_ok)
+        if changed:
+            if vault_ok:
+                logger.info(f"Vault 서버 연결 확인 완료: {VAULT_ADDR}")
+            else:
+                logger.warning("Vault 서버에 연결할 수 없습니다 (/readyz는 503)")
+        time.sleep(READINESS_PROBE_INTERVAL)
+
+
+def startup_token_check():
+    """
+    서버 시작 후 RENEWAL_TOKEN 유효성을 확인하고, 확인되면 끝나지 않은 토큰 생성 작업을 이어서 처리
+    
+    Vault 연결 실패/타임아웃은 재시도하고(그동안 /readyz는 503), Vault가 토큰을 명시적으로 거부(403)한
+    경우에만 프로세스 종료 - Vault 장애로 재시작이 반복되지 않도록 함
+    """
+    while True:
+        token_info, status_code = lookup_self(RENEWAL_TOKEN)
+        record_renewal_token_state(token_info)
+        
+        if token_info:
+            break
+        if status_code == 403:
+            logger.error("RENEWAL_TOKEN이 유효하지 않습니다!")
+            # 백그라운드 스레드에서는 sys.exit()가 스레드만 종료하므로 프로세스를 직접 종료
+            os._exit(1)
+        logger.warning(f"System - RENEWAL_TOKEN 확인 실패 (HTTP {status_code}), 5초 후 재시도...")
+        time.sleep(5)
+    
+    logger.info(f"RENEWAL_TOKEN 유효성 확인 완료")
+    logger.info(f"   - Display Name: {token_info.get('display_name', 'N/A')}")
+    logger.info(f"   - TTL: {token_info.get('ttl', 0)}초")
+    logger.info(f"   - Creation TTL: {token_info.get('creation_ttl', 0)}초")
+    
+    # 끝나지 않은 토큰 생성 작업 이어서 처리 (RENEWAL_TOKEN 확인 후)
+    if JOB_CHECKPOINT_PATH and JOB_CHECKPOINT_KEY:
+        logger.info(f"토큰 생성 작업 복원: 이어서 처리할 작업 {load_token_jobs()}건")
+
+
 def token_renewal_worker():
     """
     백그라운드 스레드에서 API 서버가 사용할 토큰을 주기적으로 갱신하는 워커
@@ -121,6 +336,7 @@ def token_renewal_worker():
             
             # 현재 토큰 정보 조회
             token_info = get_token_info(token_to_check)
+            record_renewal_token_state(token_info)
             
             if not token_info:
                 logger.error("System - 토큰 정보를 가져올 수 없습니다. 5초 후 재시도...")
@@ -160,108 +376,1282 @@ def token_renewal_worker():
             time.sleep(10)
 
 
-def verify_token(token):
+def hash_token(token):
+    """캐시 키로 사용할 토큰 해시 (원본 토큰은 메모리/파일에 남기지 않음)"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def project_token_info(data):
+    """lookup 응답에서 get_data()가 사용하는 필드만 추출"""
+    return {
+        'accessor': data.get('accessor', ''),
+        'display_name': data.get('display_name', 'unknown'),
+        'creation_time': data.get('creation_time', 'unknown'),
+        'meta': data.get('meta') or {}
+    }
+
+
+def get_cached_verification(token_hash):
+    """
+    검증 캐시 조회
+    
+    Args:
+        token_hash (str): hash_token()으로 만든 토큰 해시
+        
+    Returns:
+        dict or None: lookup 응답과 같은 형태({'data': {...}}) 또는 None (캐시 미스)
+    """
+    now = time.time()
+    with verify_cache_lock:
+        entry = verify_cache.get(token_hash)
+        if entry is None:
+            return None
+        cache_expires_at, token_expires_at, projection = entry
+        if cache_expires_at <= now:
+            del verify_cache[token_hash]
+            return None
+    
+    # TTL은 절대 만료 시각 기준으로 다시 계산 (0은 만료 없음)
+    ttl = max(0, int(token_expires_at - now)) if token_expires_at else 0
+    return {'data': dict(projection, ttl=ttl)}
+
+
+def store_verification(token_hash, data):
+    """
+    검증 성공 결과를 캐시에 저장
+    캐시 만료 시각은 VERIFY_CACHE_TTL과 토큰 자체 만료 시각 중 빠른 쪽
+    """
+    now = time.time()
+    ttl = data.get('ttl', 0)
+    token_expires_at = now + ttl if ttl else 0
+    cache_expires_at = now + VERIFY_CACHE_TTL
+    if token_expires_at:
+        cache_expires_at = min(cache_expires_at, token_expires_at)
+    
+    with verify_cache_lock:
+        # lookup 도중 폐기된 토큰은 캐시에 저장하지 않음
+        if token_hash in revocation_tombstones or data.get('accessor') in revocation_tombstones:
+            return
+        verify_cache[token_hash] = (cache_expires_at, token_expires_at, project_token_info(data))
+
+
+def purge_verifications(token_hashes=(), accessors=()):
+    """
+    폐기된 토큰의 검증 캐시 항목 제거 및 tombstone 기록
+    
+    Args:
+        token_hashes (iterable): 제거할 토큰 해시
+        accessors (set): 제거할 토큰 accessor
+        
+    Returns:
+        int: 제거한 항목 수
+    """
+    purged = 0
+    now = time.time()
+    with verify_cache_lock:
+        # 오래된 tombstone 정리 후 이번에 폐기된 항목 기록
+        for key in [k for k, t in revocation_tombstones.items() if now - t > REVOCATION_TOMBSTONE_TTL]:
+            del revocation_tombstones[key]
+        for key in itertools.chain(token_hashes, accessors):
+            revocation_tombstones[key] = now
+        
+        for token_hash in token_hashes:
+            if verify_cache.pop(token_hash, None) is not None:
+                purged += 1
+        
+        if accessors:
+            stale = [h for h, entry in verify_cache.items() if entry[2].get('accessor') in accessors]
+            for token_hash in stale:
+                del verify_cache[token_hash]
+            purged += len(stale)
+    
+    return purged
+
+
+def save_verify_cache_snapshot():
+    """
+    검증 캐시를 암호화하여 VERIFY_CACHE_SNAPSHOT_PATH에 저장
+    토큰 해시, 절대 만료 시각, 축약 정보만 기록
+    
+    Returns:
+        int: 저장한 항목 수 (스냅샷 비활성화 시 0)
+    """
+    if not VERIFY_CACHE_SNAPSHOT_PATH or not VERIFY_CACHE_SNAPSHOT_KEY:
+        return 0
+    
+    with verify_cache_snapshot_lock:
+        now = time.time()
+        with verify_cache_lock:
+            entries = [
+                [token_hash, cache_expires_at, token_expires_at, projection]
+                for token_hash, (cache_expires_at, token_expires_at, projection) in verify_cache.items()
+                if cache_expires_at > now
+            ]
+        
+        payload = json.dumps({'saved_at': now, 'entries': entries}).encode()
+        encrypted = Fernet(VERIFY_CACHE_SNAPSHOT_KEY.encode()).encrypt(payload)
+        
+        # 임시 파일에 쓴 뒤 교체하여 중간에 종료되어도 기존 스냅샷 유지
+        tmp_path = VERIFY_CACHE_SNAPSHOT_PATH + '.tmp'
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(encrypted)
+        os.replace(tmp_path, VERIFY_CACHE_SNAPSHOT_PATH)
+    
+    return len(entries)
+
+
+def load_verify_cache_snapshot():
+    """
+    서버 시작 시 스냅샷에서 아직 만료되지 않은 검증 결과를 복원
+    
+    Returns:
+        int: 복원한 항목 수
+    """
+    if not VERIFY_CACHE_SNAPSHOT_PATH or not VERIFY_CACHE_SNAPSHOT_KEY:
+        return 0
+    if not os.path.exists(VERIFY_CACHE_SNAPSHOT_PATH):
+        return 0
+    
+    try:
+        with open(VERIFY_CACHE_SNAPSHOT_PATH, 'rb') as f:
+            payload = Fernet(VERIFY_CACHE_SNAPSHOT_KEY.encode()).decrypt(f.read())
+        snapshot = json.loads(payload)
+    except (InvalidToken, ValueError) as e:
+        logger.error(f"System - 검증 캐시 스냅샷 복호화 실패: {e}")
+        return 0
+    
+    # 형식이 잘못된 스냅샷은 일부만 복원하지 않고 빈 캐시로 시작
+    now = time.time()
+    try:
+        entries = {}
+        for token_hash, cache_expires_at, token_expires_at, projection in snapshot['entries']:
+            if not isinstance(token_hash, str) or not isinstance(projection, dict):
+                raise TypeError(f"잘못된 항목: {token_hash!r}")
+            if float(cache_expires_at) <= now:
+                continue
+            entries[token_hash] = (float(cache_expires_at), float(token_expires_at), projection)
+    except (TypeError, ValueError, KeyError, AttributeError) as e:
+        logger.error(f"System - 검증 캐시 스냅샷 형식 오류, 빈 캐시로 시작: {e}")
+        return 0
+    
+    with verify_cache_lock:
+        verify_cache.update(entries)
+    
+    return len(entries)
+
+
+def verify_cache_snapshot_worker():
+    """
+    백그라운드 스레드에서 만료된 캐시 항목을 정리하고 주기적으로 스냅샷 저장
+    """
+    logger.info("검증 캐시 스냅샷 워커 시작")
+    
+    while True:
+        time.sleep(VERIFY_CACHE_SNAPSHOT_INTERVAL)
+        try:
+            now = time.time()
+            with verify_cache_lock:
+                expired = [h for h, entry in verify_cache.items() if entry[0] <= now]
+                for token_hash in expired:
+                    del verify_cache[token_hash]
+            
+            saved = save_verify_cache_snapshot()
+            logger.info(f"System - 검증 캐시 스냅샷 저장: {saved}건")
+        except Exception as e:
+            logger.error(f"System - 검증 캐시 스냅샷 저장 오류: {e}")
+
+
+def verify_token(token):
+    """
+    API 서버가 사용하는 토큰의 유효성을 검증하는 함수
+    
+    Args:
+        token (str): 검증할 Vault 토큰
+        
+    Returns:
+        tuple: (is_valid: bool, token_info: dict or None)
+    """
+    """
+    RENEWAL_TOKEN을 사용해 다른 Vault 토큰을 lookup
+    VERIFY_CACHE_TTL > 0이면 검증 캐시를 먼저 확인
+    """
+    token_hash = None
+    if VERIFY_CACHE_TTL > 0:
+        token_hash = hash_token(token)
+        cached = get_cached_verification(token_hash)
+        if cached is not None:
+            return True, cached
+    
+    try:
+        with token_lock:
+            auth_token = current_token
+
+        response = requests.post(
+            f'{VAULT_ADDR}/v1/auth/token/lookup',
+            headers={'X-Vault-Token': auth_token},
+            json={'token': token},
+            timeout=5
+        )
+
+        if response.status_code == 200:
+            token_info = response.json()
+            if token_hash:
+                store_verification(token_hash, token_info['data'])
+            return True, token_info
+        else:
+            logger.warning(
+                f"System - 토큰 lookup 실패: HTTP {response.status_code}"
+            )
+            return False, None
+
+    except Exception as e:
+        logger.error(f"System - 토큰 lookup 오류: {e}")
+        return False, None
+
+
+def permissions_to_mask(permissions):
+    """권한 목록을 비트마스크로 변환 (알 수 없는 권한은 무시)"""
+    mask = 0
+    for name in permissions:
+        mask |= PERMISSION_BITS.get(name, 0)
+    return mask
+
+
+def mask_to_permissions(mask):
+    """비트마스크를 권한 목록으로 변환"""
+    return [name for name, bit in PERMISSION_BITS.items() if mask & bit]
+
+
+def append_token_index_log(record):
+    """인덱스 변경 내역을 로그 파일 끝에 추가 (token_index_lock 보유 상태에서 호출)"""
+    if not TOKEN_INDEX_PATH:
+        return
+    with open(TOKEN_INDEX_PATH, 'a') as f:
+        f.write(json.dumps(record) + '\n')
+
+
+def add_index_record(record):
+    """메모리 인덱스에 레코드 추가 (token_index_lock 보유 상태에서 호출)"""
+    accessor = record['accessor']
+    if accessor in token_index:
+        remove_index_record(accessor)
+    
+    token_index[accessor] = record
+    bisect.insort(token_index_names, (record['display_name'], accessor))
+    for name in mask_to_permissions(record['perms']):
+        token_index_by_permission[name].add(accessor)
+    if record.get('token_hash'):
+        token_index_hashes[record['token_hash']] = accessor
+
+
+def remove_index_record(accessor):
+    """메모리 인덱스에서 레코드 제거 (token_index_lock 보유 상태에서 호출)"""
+    record = token_index.pop(accessor, None)
+    if record is None:
+        return False
+    
+    key = (record['display_name'], accessor)
+    i = bisect.bisect_left(token_index_names, key)
+    if i < len(token_index_names) and token_index_names[i] == key:
+        token_index_names.pop(i)
+    for name in mask_to_permissions(record['perms']):
+        token_index_by_permission[name].discard(accessor)
+    token_index_hashes.pop(record.get('token_hash'), None)
+    return True
+
+
+def record_issued_token(accessor, token_hash, display_name, permissions, expires_at):
+    """
+    create_vault_token()으로 발급한 토큰을 인덱스에 기록
+    
+    Args:
+        accessor (str): 토큰 accessor
+        token_hash (str): hash_token()으로 만든 토큰 해시 (폐기 시 찾기용)
+        display_name (str): 요청한 토큰 이름
+        permissions (iterable): 부여한 권한 목록
+        expires_at (float): 만료 시각 (epoch 초)
+    """
+    record = {
+        'accessor': accessor,
+        'token_hash': token_hash,
+        'display_name': display_name,
+        'perms': permissions_to_mask(permissions),
+        'expires_at': expires_at
+    }
+    with token_index_lock:
+        add_index_record(record)
+        append_token_index_log(dict(record, op='add'))
+
+
+def remove_from_token_index(accessors=(), token_hashes=()):
+    """
+    폐기된 토큰을 인덱스에서 제거
+    
+    Returns:
+        int: 제거한 항목 수
+    """
+    removed = 0
+    with token_index_lock:
+        targets = set(accessors)
+        targets.update(token_index_hashes[h] for h in token_hashes if h in token_index_hashes)
+        for accessor in targets:
+            if remove_index_record(accessor):
+                append_token_index_log({'op': 'del', 'accessor': accessor})
+                removed += 1
+    return removed
+
+
+def query_token_index(name_prefix='', permissions=()):
+    """
+    인덱스에서 display_name 접두사와 권한으로 토큰 조회 (Vault 호출 없음)
+    
+    Args:
+        name_prefix (str): display_name 접두사
+        permissions (iterable): 모두 가지고 있어야 하는 권한 목록
+        
+    Returns:
+        list: 만료되지 않은 레코드 목록 (display_name 순)
+    """
+    mask = permissions_to_mask(permissions)
+    now = time.time()
+    
+    with token_index_lock:
+        if name_prefix:
+            # 정렬 목록에서 접두사 범위만 탐색
+            start = bisect.bisect_left(token_index_names, (name_prefix,))
+            candidates = []
+            for display_name, accessor in token_index_names[start:]:
+                if not display_name.startswith(name_prefix):
+                    break
+                candidates.append(accessor)
+        elif permissions:
+            # 가장 작은 권한 집합에서 시작
+            smallest = min((token_index_by_permission.get(p, set()) for p in permissions), key=len)
+            candidates = [accessor for _, accessor in token_index_names if accessor in smallest]
+        else:
+            candidates = [accessor for _, accessor in token_index_names]
+        
+        records = [token_index[a] for a in candidates]
+    
+    return [
+        {
+            'accessor': r['accessor'],
+            'display_name': r['display_name'],
+            'permissions': mask_to_permissions(r['perms']),
+            'expires_at': r['expires_at']
+        }
+        for r in records
+        if (r['perms'] & mask) == mask and r['expires_at'] > now
+    ]
+
+
+def load_token_index():
+    """
+    서버 시작 시 인덱스 로그를 재생하여 메모리 인덱스 복원 (만료 항목 제외)
+    
+    Returns:
+        int: 복원한 항목 수
+    """
+    if not TOKEN_INDEX_PATH or not os.path.exists(TOKEN_INDEX_PATH):
+        return 0
+    
+    with token_index_lock:
+        with open(TOKEN_INDEX_PATH) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    op = record.pop('op')
+                    if op == 'add':
+                        # 인덱스를 건드리기 전에 필드 형식부터 확인
+                        record = {
+                            'accessor': str(record['accessor']),
+                            'token_hash': record.get('token_hash'),
+                            'display_name': str(record['display_name']),
+                            'perms': int(record['perms']),
+                            'expires_at': float(record['expires_at'])
+                        }
+                        add_index_record(record)
+                    else:
+                        remove_index_record(record['accessor'])
+                except (ValueError, KeyError, TypeError, AttributeError):
+                    # 비정상 종료로 마지막 줄이 잘렸거나 형식이 맞지 않는 경우
+                    logger.warning("System - 토큰 인덱스 로그의 손상된 줄을 건너뜁니다")
+                    continue
+        
+        now = time.time()
+        for accessor in [a for a, r in token_index.items() if r['expires_at'] <= now]:
+            remove_index_record(accessor)
+        
+        return len(token_index)
+
+
+def compact_token_index():
+    """
+    만료된 항목을 메모리 인덱스에서 제거하고, TOKEN_INDEX_PATH가 설정되어 있으면
+    로그 파일을 현재 인덱스 내용으로 다시 작성
+    
+    Returns:
+        int: 제거한 만료 항목 수
+    """
+    now = time.time()
+    with token_index_lock:
+        expired = [a for a, r in token_index.items() if r['expires_at'] <= now]
+        for accessor in expired:
+            remove_index_record(accessor)
+        
+        if TOKEN_INDEX_PATH:
+            tmp_path = TOKEN_INDEX_PATH + '.tmp'
+            with open(tmp_path, 'w') as f:
+                for record in token_index.values():
+                    f.write(json.dumps(dict(record, op='add')) + '\n')
+            os.replace(tmp_path, TOKEN_INDEX_PATH)
+    
+    return len(expired)
+
+
+def token_index_compaction_worker():
+    """
+    백그라운드 스레드에서 TOKEN_INDEX_COMPACT_INTERVAL마다 만료 항목 정리 및 인덱스 로그 압축
+    메모리 전용 모드에서도 실행하여 발급한 토큰 수만큼 메모리가 계속 늘지 않도록 함
+    """
+    logger.info("토큰 인덱스 압축 워커 시작")
+    
+    while True:
+        time.sleep(TOKEN_INDEX_COMPACT_INTERVAL)
+        try:
+            expired = compact_token_index()
+            logger.info(f"System - 토큰 인덱스 압축 완료: 만료 {expired}건 제거, 유지 {len(token_index)}건")
+        except Exception as e:
+            logger.error(f"System - 토큰 인덱스 압축 오류: {e}")
+
+
+def create_vault_token(display_name, permissions, ttl='24h'):
+    """
+    API 서버가 요청 받은 토큰을 Vault에서 생성
+    체크한 권한 값은 metadata로 vault token에 같이 저장
+    
+    Args:
+        display_name (str): 토큰 표시 이름
+        permissions (dict): 권한 딕셔너리 (예: {'create': True, 'read': True})
+        ttl (str): 토큰 유효 시간
+        
+    Returns:
+        dict: {'success': bool, 'token': str, 'message': str}
+    """
+    try:
+        with token_lock:
+            auth_token = current_token
+        
+        # metadata 구성 (체크된 권한만 true로 설정)
+        metadata = {k: 'true' for k, v in permissions.items() if v}
+        
+        # 토큰 생성 요청
+        payload = {
+            'display_name': display_name,
+            'ttl': ttl,
+            'meta': metadata,
+            'renewable': False,
+            'policies': ["default"]
+        }
+        
+        logger.info(f"API - 토큰 생성 요청: display_name={display_name}, metadata={metadata}")
+        
+        response = requests.post(
+            f'{VAULT_ADDR}/v1/auth/token/create-orphan',
+            headers={'X-Vault-Token': auth_token},
+            json=payload,
+            timeout=5
+        )
+        
+        if response.status_code == 200:
+            result = response.json()
+            auth = result['auth']
+            token = strip_vault_prefix(auth['client_token'])
+            logger.info(f"API - 토큰 생성 성공: {token[:10]}...")
+            
+            # 인덱스 기록 실패가 이미 생성된 토큰의 반환을 막지 않도록 별도 처리
+            try:
+                record_issued_token(
+                    auth.get('accessor', ''),
+                    hash_token(auth['client_token']),
+                    display_name,
+                    metadata,
+                    time.time() + auth.get('lease_duration', 0)
+                )
+            except Exception as e:
+                logger.error(f"System - 토큰 인덱스 기록 실패: {e}")
+            
+            return {
+                'success': True,
+                'token': token,
+                'message': 'api 토큰이 성공적으로 생성되었습니다'
+            }
+        else:
+            error_msg = f"API - 토큰 생성 실패: HTTP {response.status_code}"
+            logger.error(error_msg)
+            return {
+                'success': False,
+                'token': None,
+                'message': error_msg
+            }
+            
+    except Exception as e:
+        error_msg = f"API - 토큰 생성 중 오류: {e}"
+        logger.error(error_msg)
+        return {
+            'success': False,
+            'token': None,
+            'message': error_msg
+        }
+
+
+def list_token_accessors():
+    """
+    Vault에 존재하는 모든 토큰 accessor 목록 조회
+    (RENEWAL_TOKEN에 auth/token/accessors sudo+list 권한 필요)
+    
+    Returns:
+        list or None: accessor 목록 또는 None (실패 시)
+    """
+    try:
+        with token_lock:
+            auth_token = current_token
+        
+        response = requests.request(
+            'LIST',
+            f'{VAULT_ADDR}/v1/auth/token/accessors',
+            headers={'X-Vault-Token': auth_token},
+            timeout=30
+        )
+        
+        if response.status_code == 200:
+            return response.json()['data']['keys']
+        if response.status_code == 404:
+            # Vault는 목록이 비어 있으면 404 반환
+            return []
+        logger.warning(f"System - accessor 목록 조회 실패: HTTP {response.status_code}")
+        return None
+    except Exception as e:
+        logger.error(f"System - accessor 목록 조회 오류: {e}")
+        return None
+
+
+def lookup_token_accessor(accessor):
+    """
+    accessor로 토큰 정보 조회 (토큰 값 없이 메타데이터만 반환됨)
+    
+    Args:
+        accessor (str): 조회할 토큰 accessor
+        
+    Returns:
+        tuple: (token_info: dict or None, error: str or None)
+            - 성공: (토큰 정보, None)
+            - 토큰 없음/만료 (HTTP 400, 404): (None, None)
+            - 그 외 실패: (None, 오류 메시지)
+    """
+    try:
+        with token_lock:
+            auth_token = current_token
+        
+        response = requests.post(
+            f'{VAULT_ADDR}/v1/auth/token/lookup-accessor',
+            headers={'X-Vault-Token': auth_token},
+            json={'accessor': accessor},
+            timeout=5
+        )
+        
+        if response.status_code == 200:
+            return response.json()['data'], None
+        if response.status_code in (400, 404):
+            return None, None
+        logger.warning(f"System - accessor lookup 실패: HTTP {response.status_code}")
+        return None, f"HTTP {response.status_code}"
+    except Exception as e:
+        logger.error(f"System - accessor lookup 오류: {e}")
+        return None, str(e)
+
+
+def match_display_name(display_name, prefix):
+    """display_name 접두사 비교 (Vault가 붙이는 'token-' 접두사 유무 모두 허용)"""
+    return display_name.startswith(prefix) or display_name.startswith('token-' + prefix)
+
+
+def match_permissions(meta, permissions):
+    """요청한 권한이 모두 meta에 'true'로 설정되어 있는지 확인"""
+    return all(meta.get(p) == 'true' for p in permissions)
+
+
+def iter_token_inventory(accessors, name_prefix='', permissions=(), cursor='', limit=0):
+    """
+    accessor 목록을 순서대로 조회하며 조건에 맞는 토큰 정보를 하나씩 반환하는 제너레이터
+    
+    Vault lookup은 INVENTORY_CONCURRENCY 단위 묶음으로 병렬 처리하므로
+    동시에 메모리에 올라가는 조회 결과는 묶음 크기로 제한됨
+    
+    Args:
+        accessors (list): 정렬된 accessor 목록
+        name_prefix (str): display_name 접두사 필터
+        permissions (iterable): 모두 가지고 있어야 하는 권한 목록
+        cursor (str): 이 accessor 다음부터 조회 (이어받기)
+        limit (int): 최대 반환 건수, 0이면 제한 없음
+        
+    Yields:
+        dict: 토큰 정보 레코드 또는 조회 실패 레코드 {'accessor': str, 'error': str},
+            마지막 줄은 {'next_cursor': str or None}
+    """
+    start = bisect.bisect_right(accessors, cursor) if cursor else 0
+    emitted = 0
+    
+    with ThreadPoolExecutor(max_workers=INVENTORY_CONCURRENCY) as executor:
+        for batch_start in range(start, len(accessors), INVENTORY_CONCURRENCY):
+            batch = accessors[batch_start:batch_start + INVENTORY_CONCURRENCY]
+            
+            for accessor, (data, error) in zip(batch, executor.map(lookup_token_accessor, batch)):
+                if error is not None:
+                    # 조회 실패는 건너뛰지 않고 알려서 다시 조회할 수 있게 함
+                    yield {'accessor': accessor, 'error': error}
+                    continue
+                if data is None:
+                    continue
+                
+                display_name = data.get('display_name', '')
+                meta = data.get('meta') or {}
+                if name_prefix and not match_display_name(display_name, name_prefix):
+                    continue
+                if permissions and not match_permissions(meta, permissions):
+                    continue
+                
+                yield {
+                    'accessor': accessor,
+                    'display_name': display_name,
+                    'creation_time': data.get('creation_time'),
+                    'expire_time': data.get('expire_time'),
+                    'ttl': data.get('ttl', 0),
+                    'policies': data.get('policies', []),
+                    'meta': meta
+                }
+                emitted += 1
+                
+                if limit and emitted >= limit:
+                    yield {'next_cursor': accessor}
+                    return
+    
+    yield {'next_cursor': None}
+
+
+def revoke_vault_token(kind, value):
+    """
+    Vault 토큰 폐기
+    
+    Args:
+        kind (str): 'token' 또는 'accessor'
+        value (str): 토큰 값 (hvs. 접두사 생략 가능) 또는 accessor
+        
+    Returns:
+        bool: 성공 여부
+    """
+    if kind == 'token':
+        path, payload = 'revoke', {'token': attach_vault_prefix(value)}
+    else:
+        path, payload = 'revoke-accessor', {'accessor': value}
+    
+    try:
+        with token_lock:
+            auth_token = current_token
+        
+        response = requests.post(
+            f'{VAULT_ADDR}/v1/auth/token/{path}',
+            headers={'X-Vault-Token': auth_token},
+            json=payload,
+            timeout=5
+        )
+        
+        if response.status_code in (200, 204):
+            return True
+        logger.warning(f"API - 토큰 폐기 실패 ({kind}): HTTP {response.status_code}")
+        return False
+    except Exception as e:
+        logger.error(f"API - 토큰 폐기 중 오류 ({kind}): {e}")
+        return False
+
+
+def iter_revocations(targets):
+    """
+    (kind, value) 목록을 REVOKE_CONCURRENCY 단위로 병렬 폐기하며 진행 상황을 하나씩 반환하는 제너레이터
+    
+    각 묶음의 폐기가 끝나면 결과를 반환하기 전에 검증 캐시에서 해당 토큰을 제거하고 스냅샷도 다시 저장
+    
+    Args:
+        targets (iterable): ('token', 토큰), ('accessor', accessor) 또는
+            ('error', accessor, 오류 메시지) 튜플 - error는 폐기하지 않고 실패로 집계
+        
+    Yields:
+        dict: 항목별 결과, 마지막 줄은 전체 요약
+    """
+    targets = iter(targets)
+    total = revoked = 0
+    
+    with ThreadPoolExecutor(max_workers=REVOKE_CONCURRENCY) as executor:
+        while True:
+            batch = list(itertools.islice(targets, REVOKE_CONCURRENCY))
+            if not batch:
+                break
+            
+            results = list(executor.map(
+                lambda target: target[0] != 'error' and revoke_vault_token(*target[:2]),
+                batch
+            ))
+            done = [target[:2] for target, ok in zip(batch, results) if ok]
+            revoked_hashes = [hash_token(attach_vault_prefix(value)) for kind, value in done if kind == 'token']
+            revoked_accessors = {value for kind, value in done if kind == 'accessor'}
+            purge_verifications(revoked_hashes, revoked_accessors)
+            remove_from_token_index(revoked_accessors, revoked_hashes)
+            if done:
+                # 다음 주기 저장 전에 종료되어도 재시작 시 폐기된 토큰이 스냅샷에서 복원되지 않도록 즉시 저장
+                try:
+                    save_verify_cache_snapshot()
+                except Exception as e:
+                    logger.error(f"System - 검증 캐시 스냅샷 저장 오류: {e}")
+            
+            for target, ok in zip(batch, results):
+                kind, value = target[:2]
+                total += 1
+                revoked += ok
+                if kind == 'error':
+                    yield {'accessor': value, 'revoked': False, 'error': target[2]}
+                    continue
+                # 토큰 값은 응답에 일부만 노출
+                shown = strip_vault_prefix(value)[:10] + '...' if kind == 'token' else value
+                yield {kind: shown, 'revoked': ok}
+    
+    logger.info(f"API - 토큰 일괄 폐기 완료: {revoked}/{total}")
+    yield {'done': True, 'total': total, 'revoked': revoked, 'failed': total - revoked}
+
+
+def check_admin_key():
+    """
+    관리자 API 요청의 Admin-Key 헤더 검증
+    
+    Returns:
+        tuple or None: 실패 시 (응답, 상태 코드), 성공 시 None
+    """
+    if not ADMIN_API_KEY:
+        return jsonify({
+            'error': 'Admin API disabled',
+            'message': 'ADMIN_API_KEY가 설정되지 않아 관리자 API를 사용할 수 없습니다'
+        }), 403
+    
+    if not hmac.compare_digest(request.headers.get('Admin-Key', ''), ADMIN_API_KEY):
+        logger.warning("API - 잘못된 관리자 키로 접근 시도")
+        return jsonify({
+            'error': 'Unauthorized',
+            'message': 'Admin-Key 헤더가 올바르지 않습니다'
+        }), 401
+    
+    return None
+
+
+def begin_idempotent_request(key, fingerprint):
+    """
+    Idempotency-Key로 토큰 생성 요청 등록
+    
+    Args:
+        key (str): Idempotency-Key 헤더 값
+        fingerprint (str): 요청 본문 해시 (같은 키에 다른 요청이 오는지 확인용)
+        
+    Returns:
+        tuple: (entry: dict, is_owner: bool) - is_owner가 True면 이 요청이 실제로 생성 수행
+               보관소가 처리 중인 요청으로 가득 차 있으면 (None, False)
+    """
+    now = time.time()
+    with idempotency_lock:
+        # 앞쪽이 가장 오래된 항목이므로 만료되었거나 개수를 초과한 항목부터 제거
+        # 처리 중인 항목은 제거하지 않음 (제거하면 같은 키의 재시도가 토큰을 중복 생성)
+        while idempotency_store:
+            oldest = next(iter(idempotency_store.values()))
+            if oldest['expires_at'] > now and len(idempotency_store) < IDEMPOTENCY_MAX_KEYS:
+                break
+            if not oldest['done'].is_set():
+                break
+            idempotency_store.popitem(last=False)
+        
+        entry = idempotency_store.get(key)
+        if entry is not None:
+            # 앞쪽의 처리 중 항목 때문에 정리되지 않은 만료 항목은 재사용하지 않음
+            if entry['expires_at'] > now or not entry['done'].is_set():
+                return entry, False
+            del idempotency_store[key]
+        
+        if len(idempotency_store) >= IDEMPOTENCY_MAX_KEYS:
+            # 맨 앞이 처리 중이면 그 뒤에서 완료된 가장 오래된 항목 제거
+            evictable = next((k for k, e in idempotency_store.items() if e['done'].is_set()), None)
+            if evictable is None:
+                return None, False
+            del idempotency_store[evictable]
+        
+        entry = {
+            'fingerprint': fingerprint,
+            'expires_at': now + IDEMPOTENCY_TTL,
+            'done': threading.Event(),
+            'result': None
+        }
+        idempotency_store[key] = entry
+        return entry, True
+
+
+def finish_idempotent_request(key, entry, result):
+    """
+    토큰 생성 결과를 기록하고 대기 중인 중복 요청을 깨움
+    실패한 결과는 보관하지 않아 이후 재시도가 다시 생성을 시도할 수 있음
+    """
+    entry['result'] = result
+    if not result['success']:
+        with idempotency_lock:
+            if idempotency_store.get(key) is entry:
+                del idempotency_store[key]
+    entry['done'].set()
+
+
+# ============== 사용량 집계 ==============
+
+def sketch_hash(key):
+    """sketch에서 공통으로 사용하는 128비트 해시"""
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=16).digest(), 'big')
+
+
+class CountMinSketch:
+    """고정 크기 count-min sketch - 키별 요청 수의 상한 추정"""
+    
+    def __init__(self, width=2048, depth=4):
+        self.width = width
+        self.depth = depth
+        self.table = array('L', [0]) * (width * depth)
+    
+    def add(self, h):
+        """
+        해시 h의 빈도를 1 증가
+        
+        Returns:
+            int: 증가 후 추정 빈도
+        """
+        # 128비트 해시를 두 개의 64비트 해시로 나누어 depth개의 위치 생성
+        h1, h2 = h >> 64, h & 0xFFFFFFFFFFFFFFFF
+        estimate = None
+        for row in range(self.depth):
+            i = row * self.width + (h1 + row * h2) % self.width
+            self.table[i] += 1
+            if estimate is None or self.table[i] < estimate:
+                estimate = self.table[i]
+        return estimate
+
+
+class HeavyHitters:
+    """count-min 추정값 기준 상위 K개 키 (최소 힙, 힙 크기는 항상 K 이하)"""
+    
+    def __init__(self, k):
+        self.k = k
+        self.counts = {}
+        self.labels = {}
+        self.heap = []
+    
+    def offer(self, key, count, label=None):
+        """키의 최신 추정값을 반영하여 상위 K개 갱신"""
+        if self.k <= 0:
+            return
+        if key in self.counts:
+            # 힙 항목은 나중에 최솟값을 꺼낼 때 최신 값으로 보정
+            self.counts[key] = count
+            return
+        
+        if len(self.counts) >= self.k:
+            while True:
+                smallest, smallest_key = self.heap[0]
+                if self.counts[smallest_key] == smallest:
+                    break
+                heapq.heapreplace(self.heap, (self.counts[smallest_key], smallest_key))
+            if count <= smallest:
+                return
+            heapq.heappop(self.heap)
+            del self.counts[smallest_key]
+            self.labels.pop(smallest_key, None)
+        
+        self.counts[key] = count
+        if label is not None:
+            self.labels[key] = label
+        heapq.heappush(self.heap, (count, key))
+    
+    def items(self):
+        """(키, 추정 빈도, 라벨) 목록 (빈도 내림차순)"""
+        return sorted(
+            ((key, count, self.labels.get(key)) for key, count in self.counts.items()),
+            key=lambda item: item[1],
+            reverse=True
+        )
+
+
+class HyperLogLog:
+    """HyperLogLog - 고유 키 수 추정 (2^p 바이트 고정 메모리, 표준 오차 약 1.04/sqrt(2^p))"""
+    
+    def __init__(self, p=12):
+        self.p = p
+        self.m = 1 << p
+        self.registers = bytearray(self.m)
+    
+    def add(self, h):
+        """128비트 해시 h 중 상위 64비트 사용"""
+        x = h >> 64
+        index = x >> (64 - self.p)
+        rest = x & ((1 << (64 - self.p)) - 1)
+        rank = (64 - self.p) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+    
+    def count(self):
+        """고유 키 수 추정값"""
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        estimate = alpha * self.m * self.m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * self.m and zeros:
+            # 작은 값은 linear counting으로 보정
+            estimate = self.m * math.log(self.m / zeros)
+        return int(estimate)
+
+
+def new_usage_window(start):
+    """집계 구간 하나에 해당하는 sketch 묶음 생성"""
+    return {
+        'start': start,
+        'requests': 0,
+        'token_counts': CountMinSketch(),
+        'top_tokens': HeavyHitters(USAGE_TOP_K),
+        'distinct_tokens': HyperLogLog(),
+        'client_counts': CountMinSketch(),
+        'top_clients': HeavyHitters(USAGE_TOP_K),
+        'distinct_clients': HyperLogLog()
+    }
+
+
+def rotate_usage_windows(now):
+    """
+    현재 시각 기준으로 집계 구간 교체 (usage_lock 보유 상태에서 호출)
+    
+    현재 구간이 끝났으면 직전 구간으로 넘기고, 두 구간 이상 요청이 없었다면
+    오래된 구간을 직전 구간으로 보여주지 않도록 버림
+    """
+    global usage_window, previous_usage_window
+    
+    if usage_window is None or now - usage_window['start'] < USAGE_WINDOW:
+        return
+    
+    if now - usage_window['start'] < 2 * USAGE_WINDOW:
+        previous_usage_window = usage_window
+    else:
+        previous_usage_window = None
+    usage_window = None
+
+
+def record_usage(client, accessor=None, display_name=None):
+    """
+    /api/data 요청 1건을 사용량 sketch에 반영
+    
+    Args:
+        client (str): 클라이언트 주소
+        accessor (str): 검증에 성공한 토큰의 accessor (실패 시 None)
+        display_name (str): 토큰 표시 이름 (상위 토큰 표시용)
+    """
+    global usage_window
+    
+    if not USAGE_ANALYTICS:
+        return
+    
+    client_hash = sketch_hash(client)
+    token_hash = sketch_hash(accessor) if accessor else None
+    now = time.time()
+    
+    with usage_lock:
+        rotate_usage_windows(now)
+        if usage_window is None:
+            usage_window = new_usage_window(now - (now % USAGE_WINDOW))
+        
+        window = usage_window
+        window['requests'] += 1
+        window['top_clients'].offer(client, window['client_counts'].add(client_hash))
+        window['distinct_clients'].add(client_hash)
+        
+        if token_hash is not None:
+            window['top_tokens'].offer(accessor, window['token_counts'].add(token_hash), display_name)
+            window['distinct_tokens'].add(token_hash)
+
+
+def summarize_usage_window(window):
+    """집계 구간을 응답용 dict로 변환 (usage_lock 보유 상태에서 호출)"""
+    if window is None:
+        return None
+    return {
+        'start': window['start'],
+        'requests': window['requests'],
+        'distinct_tokens': window['distinct_tokens'].count(),
+        'distinct_clients': window['distinct_clients'].count(),
+        'top_tokens': [
+            {'accessor': key, 'display_name': label, 'count': count}
+            for key, count, label in window['top_tokens'].items()
+        ],
+        'top_clients': [
+            {'client': key, 'count': count}
+            for key, count, _ in window['top_clients'].items()
+        ]
+    }
+
+
+# ============== 백그라운드 토큰 생성 작업 ==============
+
+def wait_for_vault_budget():
+    """
+    JOB_VAULT_QPS 예산에 맞춰 다음 Vault 요청 시각까지 대기 (모든 작업 워커가 공유)
+    JOB_VAULT_QPS가 0 이하이면 제한하지 않음
+    """
+    global job_next_slot
+    
+    if JOB_VAULT_QPS <= 0:
+        return
+    
+    with job_rate_lock:
+        now = time.monotonic()
+        slot = max(now, job_next_slot)
+        job_next_slot = slot + 1.0 / JOB_VAULT_QPS
+    
+    if slot > now:
+        time.sleep(slot - now)
+
+
+def append_job_log(record):
+    """작업 체크포인트 로그에 한 줄 추가 (줄마다 Fernet으로 암호화, 토큰 값 포함)"""
+    if not JOB_CHECKPOINT_PATH or not JOB_CHECKPOINT_KEY:
+        return
+    line = Fernet(JOB_CHECKPOINT_KEY.encode()).encrypt(json.dumps(record).encode())
+    with open(JOB_CHECKPOINT_PATH, 'ab') as f:
+        f.write(line + b'\n')
+
+
+def summarize_job(job):
+    """작업 진행 상황 (token_jobs_cond 보유 상태에서 호출)"""
+    return {
+        'job_id': job['id'],
+        'status': job['status'],
+        'name': job['name'],
+        'total': job['count'],
+        'done': len(job['results']),
+        'succeeded': job['succeeded'],
+        'failed': len(job['results']) - job['succeeded'],
+        'created_at': job['created_at'],
+        'finished_at': job['finished_at'],
+        'error': job['error']
+    }
+
+
+def new_token_job(job_id, name, count, permissions, created_at):
+    """작업 dict 생성"""
+    return {
+        'id': job_id,
+        'name': name,
+        'count': count,
+        'permissions': permissions,
+        'status': 'queued',
+        'created_at': created_at,
+        'finished_at': None,
+        'error': None,
+        'results': [],
+        'succeeded': 0
+    }
+
+
+def prune_token_jobs():
+    """JOB_RETENTION보다 오래된 완료 작업 제거 (token_jobs_cond 보유 상태에서 호출)"""
+    cutoff = time.time() - JOB_RETENTION
+    for job_id in [i for i, job in token_jobs.items() if job['finished_at'] and job['finished_at'] < cutoff]:
+        del token_jobs[job_id]
+
+
+def run_token_job(job_id):
     """
-    API 서버가 사용하는 토큰의 유효성을 검증하는 함수
+    작업의 남은 토큰을 순서대로 생성
     
-    Args:
-        token (str): 검증할 Vault 토큰
-        
-    Returns:
-        tuple: (is_valid: bool, token_info: dict or None)
-    """
-    """
-    RENEWAL_TOKEN을 사용해 다른 Vault 토큰을 lookup
+    생성 결과는 메모리에 먼저 반영하여 체크포인트 기록이 실패해도 이미 만든 토큰을 돌려줄 수 있게 하고,
+    중간에 오류가 나면 작업을 'failed' 상태로 끝내 결과 스트림이 무한히 기다리지 않게 함
     """
+    with token_jobs_cond:
+        job = token_jobs.get(job_id)
+        if job is None:
+            return
+        job['status'] = 'running'
+        start = len(job['results'])
+    
+    logger.info(f"API - 토큰 생성 작업 시작: {job_id} ({start}/{job['count']})")
+    
+    status, error = 'failed', '작업이 중단되었습니다'
     try:
-        with token_lock:
-            auth_token = current_token
+        for i in range(start, job['count']):
+            name = f"{job['name']}-{i:05d}"
+            wait_for_vault_budget()
+            result = create_vault_token(name, job['permissions'])
+            item = dict(result, index=i, name=name)
+            
+            with token_jobs_cond:
+                job['results'].append(item)
+                job['succeeded'] += result['success']
+                token_jobs_cond.notify_all()
+            append_job_log({'op': 'item', 'job': job_id, 'item': item})
+        
+        append_job_log({'op': 'done', 'job': job_id, 'finished_at': time.time()})
+        status, error = 'done', None
+    except Exception as e:
+        error = str(e)
+        logger.error(f"API - 토큰 생성 작업 오류 ({job_id}): {e}")
+        try:
+            append_job_log({'op': 'failed', 'job': job_id, 'finished_at': time.time(), 'error': error})
+        except Exception as log_error:
+            logger.error(f"System - 작업 체크포인트 기록 실패 ({job_id}): {log_error}")
+    finally:
+        with token_jobs_cond:
+            job['status'] = status
+            job['error'] = error
+            job['finished_at'] = time.time()
+            prune_token_jobs()
+            token_jobs_cond.notify_all()
+    
+    logger.info(f"API - 토큰 생성 작업 종료: {job_id} ({status}, 성공 {job['succeeded']}/{job['count']})")
 
-        response = requests.post(
-            f'{VAULT_ADDR}/v1/auth/token/lookup',
-            headers={'X-Vault-Token': auth_token},
-            json={'token': token},
-            timeout=5
-        )
 
-        if response.status_code == 200:
-            return True, response.json()
-        else:
-            logger.warning(
-                f"System - 토큰 lookup 실패: HTTP {response.status_code}"
-            )
-            return False, None
+def token_job_worker():
+    """작업 큐에서 작업을 꺼내 처리하는 워커"""
+    while True:
+        job_id = token_job_queue.get()
+        try:
+            run_token_job(job_id)
+        except Exception as e:
+            logger.error(f"API - 토큰 생성 작업 오류 ({job_id}): {e}")
 
-    except Exception as e:
-        logger.error(f"System - 토큰 lookup 오류: {e}")
-        return False, None
 
+def ensure_token_job_workers():
+    """작업 워커 스레드가 없으면 JOB_WORKERS개 시작 (첫 작업 등록 시)"""
+    with token_jobs_cond:
+        if token_job_workers:
+            return
+        for _ in range(JOB_WORKERS):
+            worker = threading.Thread(target=token_job_worker, daemon=True)
+            worker.start()
+            token_job_workers.append(worker)
+    logger.info(f"토큰 생성 작업 워커 {JOB_WORKERS}개 시작됨")
 
-def create_vault_token(display_name, permissions, ttl='24h'):
+
+def submit_token_job(name, count, permissions):
     """
-    API 서버가 요청 받은 토큰을 Vault에서 생성
-    체크한 권한 값은 metadata로 vault token에 같이 저장
+    토큰 생성 작업 등록
     
-    Args:
-        display_name (str): 토큰 표시 이름
-        permissions (dict): 권한 딕셔너리 (예: {'create': True, 'read': True})
-        ttl (str): 토큰 유효 시간
-        
     Returns:
-        dict: {'success': bool, 'token': str, 'message': str}
+        str or None: 작업 ID, 대기/진행 중인 작업이 JOB_MAX_PENDING개 이상이면 None
     """
-    try:
-        with token_lock:
-            auth_token = current_token
-        
-        # metadata 구성 (체크된 권한만 true로 설정)
-        metadata = {k: 'true' for k, v in permissions.items() if v}
+    job_id = secrets.token_urlsafe(16)
+    created_at = time.time()
+    
+    with token_jobs_cond:
+        prune_token_jobs()
+        pending = sum(1 for job in token_jobs.values() if job['status'] in ('queued', 'running'))
+        if pending >= JOB_MAX_PENDING:
+            return None
         
-        # 토큰 생성 요청
-        payload = {
-            'display_name': display_name,
-            'ttl': ttl,
-            'meta': metadata,
-            'renewable': False,
-            'policies': ["default"]
-        }
+        append_job_log({
+            'op': 'job', 'job': job_id, 'name': name, 'count': count,
+            'permissions': permissions, 'created_at': created_at
+        })
+        token_jobs[job_id] = new_token_job(job_id, name, count, permissions, created_at)
+    
+    ensure_token_job_workers()
+    token_job_queue.put(job_id)
+    return job_id
+
+
+def load_token_jobs():
+    """
+    서버 시작 시 체크포인트 로그를 재생하여 작업 복원
+    보관 기간이 지난 작업을 뺀 내용으로 로그를 다시 작성하고, 끝나지 않은 작업은 큐에 다시 등록
+    
+    Returns:
+        int: 이어서 처리할 작업 수
+    """
+    if not JOB_CHECKPOINT_PATH or not JOB_CHECKPOINT_KEY:
+        return 0
+    if not os.path.exists(JOB_CHECKPOINT_PATH):
+        return 0
+    
+    fernet = Fernet(JOB_CHECKPOINT_KEY.encode())
+    with open(JOB_CHECKPOINT_PATH, 'rb') as f:
+        lines = [line.strip() for line in f if line.strip()]
+    
+    records = []
+    for i, line in enumerate(lines):
+        try:
+            records.append(json.loads(fernet.decrypt(line)))
+        except (InvalidToken, ValueError):
+            if i == len(lines) - 1:
+                # 비정상 종료로 마지막 줄이 잘린 경우
+                logger.warning("System - 작업 체크포인트 로그의 잘린 마지막 줄을 건너뜁니다")
+                continue
+            # 키가 다르거나 중간 줄이 손상된 경우 - 완료된 작업의 토큰이 이 로그에만 있으므로
+            # 덮어쓰지 않고 옆으로 옮긴 뒤 빈 상태로 시작
+            moved_path = f"{JOB_CHECKPOINT_PATH}.unreadable-{int(time.time())}"
+            os.replace(JOB_CHECKPOINT_PATH, moved_path)
+            logger.error(
+                f"System - 작업 체크포인트 로그 {i + 1}번째 줄 복호화 실패 "
+                f"(JOB_CHECKPOINT_KEY 확인 필요), 기존 로그를 {moved_path}로 옮겼습니다"
+            )
+            return 0
+    
+    with token_jobs_cond:
+        for record in records:
+            job = token_jobs.get(record['job'])
+            if record['op'] == 'job':
+                token_jobs[record['job']] = new_token_job(
+                    record['job'], record['name'], record['count'],
+                    record['permissions'], record['created_at']
+                )
+            elif job and record['op'] == 'item' and record['item']['index'] == len(job['results']):
+                job['results'].append(record['item'])
+                job['succeeded'] += record['item']['success']
+            elif job and record['op'] in ('done', 'failed'):
+                job['status'] = record['op']
+                job['finished_at'] = record['finished_at']
+                job['error'] = record.get('error')
         
-        logger.info(f"API - 토큰 생성 요청: display_name={display_name}, metadata={metadata}")
+        prune_token_jobs()
         
-        response = requests.post(
-            f'{VAULT_ADDR}/v1/auth/token/create-orphan',
-            headers={'X-Vault-Token': auth_token},
-            json=payload,
-            timeout=5
-        )
+        # 남은 작업만으로 로그 압축
+        tmp_path = JOB_CHECKPOINT_PATH + '.tmp'
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            for job in token_jobs.values():
+                records = [{
+                    'op': 'job', 'job': job['id'], 'name': job['name'], 'count': job['count'],
+                    'permissions': job['permissions'], 'created_at': job['created_at']
+                }]
+                records += [{'op': 'item', 'job': job['id'], 'item': item} for item in job['results']]
+                if job['finished_at']:
+                    records.append({
+                        'op': job['status'], 'job': job['id'],
+                        'finished_at': job['finished_at'], 'error': job['error']
+                    })
+                for record in records:
+                    f.write(fernet.encrypt(json.dumps(record).encode()) + b'\n')
+        os.replace(tmp_path, JOB_CHECKPOINT_PATH)
         
-        if response.status_code == 200:
-            result = response.json()
-            token = strip_vault_prefix(result['auth']['client_token'])
-            logger.info(f"API - 토큰 생성 성공: {token[:10]}...")
-            
-            return {
-                'success': True,
-                'token': token,
-                'message': 'api 토큰이 성공적으로 생성되었습니다'
-            }
-        else:
-            error_msg = f"API - 토큰 생성 실패: HTTP {response.status_code}"
-            logger.error(error_msg)
-            return {
-                'success': False,
-                'token': None,
-                'message': error_msg
-            }
-            
-    except Exception as e:
-        error_msg = f"API - 토큰 생성 중 오류: {e}"
-        logger.error(error_msg)
-        return {
-            'success': False,
-            'token': None,
-            'message': error_msg
-        }
+        pending = [job_id for job_id, job in token_jobs.items() if job['status'] not in ('done', 'failed')]
+    
+    if pending:
+        ensure_token_job_workers()
+        for job_id in pending:
+            token_job_queue.put(job_id)
+    return len(pending)
 
 
 # ============== 웹 UI ==============
@@ -620,6 +2010,8 @@ def api_create_token():
                 "list": true
             }
         }
+    
+    Idempotency-Key 헤더가 있으면 같은 키의 재시도에는 처음 생성 결과를 그대로 반환
     """
     try:
         data = request.get_json()
@@ -632,13 +2024,52 @@ def api_create_token():
                 'message': '토큰 이름은 필수입니다'
             }), 400
         
+        idempotency_key = request.headers.get('Idempotency-Key')
+        if not idempotency_key:
+            result = create_vault_token(name, permissions)
+            return jsonify(result), 200 if result['success'] else 500
+        
+        # 다른 클라이언트가 같은 키로 결과를 가져가지 않도록 클라이언트 주소별로 구분
+        idempotency_key = f"{request.remote_addr or 'unknown'}:{idempotency_key}"
+        fingerprint = hashlib.sha256(
+            json.dumps([name, permissions], sort_keys=True).encode()
+        ).hexdigest()
+        entry, is_owner = begin_idempotent_request(idempotency_key, fingerprint)
+        
+        if entry is None:
+            return jsonify({
+                'success': False,
+                'message': '처리 중인 Idempotency-Key 요청이 너무 많습니다'
+            }), 503
+        
+        if not is_owner:
+            if entry['fingerprint'] != fingerprint:
+                return jsonify({
+                    'success': False,
+                    'message': '같은 Idempotency-Key로 다른 요청이 이미 처리되었습니다'
+                }), 422
+            
+            # 처리 중인 첫 요청이 끝날 때까지 대기
+            if not entry['done'].wait(IDEMPOTENCY_WAIT_TIMEOUT):
+                return jsonify({
+                    'success': False,
+                    'message': '같은 Idempotency-Key의 요청이 아직 처리 중입니다'
+                }), 409
+            
+            logger.info(f"API - Idempotency-Key 재요청, 기존 결과 반환: display_name={name}")
+            result = entry['result']
+            response = jsonify(result)
+            response.headers['Idempotent-Replayed'] = 'true'
+            return response, 200 if result['success'] else 500
+        
         # 토큰 생성
-        result = create_vault_token(name, permissions)
+        result = {'success': False, 'token': None, 'message': 'API - 토큰 생성 중단'}
+        try:
+            result = create_vault_token(name, permissions)
+        finally:
+            finish_idempotent_request(idempotency_key, entry, result)
         
-        if result['success']:
-            return jsonify(result), 200
-        else:
-            return jsonify(result), 500
+        return jsonify(result), 200 if result['success'] else 500
             
     except Exception as e:
         logger.error(f"API 오류: {e}")
@@ -648,6 +2079,132 @@ def api_create_token():
         }), 500
 
 
+@app.route('/api/token/jobs', methods=['POST'])
+def api_submit_token_job():
+    """
+    대량 토큰 생성 작업 등록 API (관리자 전용) - 즉시 202와 작업 ID를 반환하고 백그라운드에서 생성
+    
+    Request Body:
+        {
+            "name": "토큰 이름 접두사 (토큰 이름은 name-00000 형식)",
+            "count": 1000,
+            "permissions": {"read": true, "list": true}
+        }
+    """
+    error = check_admin_key()
+    if error:
+        return error
+    
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        data = {}
+    name = data.get('name')
+    count = data.get('count')
+    permissions = data.get('permissions', {})
+    
+    if not name:
+        return jsonify({
+            'success': False,
+            'message': '토큰 이름은 필수입니다'
+        }), 400
+    if not isinstance(count, int) or not 0 < count <= JOB_MAX_COUNT:
+        return jsonify({
+            'success': False,
+            'message': f'count는 1 이상 {JOB_MAX_COUNT} 이하의 정수여야 합니다'
+        }), 400
+    
+    if not isinstance(permissions, dict):
+        return jsonify({
+            'success': False,
+            'message': 'permissions는 객체여야 합니다'
+        }), 400
+    
+    job_id = submit_token_job(name, count, permissions)
+    if job_id is None:
+        return jsonify({
+            'success': False,
+            'message': f'대기/진행 중인 작업이 최대 개수({JOB_MAX_PENDING})에 도달했습니다'
+        }), 429
+    logger.info(f"API - 토큰 생성 작업 등록: {job_id}, name={name}, count={count}")
+    
+    return jsonify({
+        'success': True,
+        'job_id': job_id,
+        'status_url': f'/api/token/jobs/{job_id}',
+        'results_url': f'/api/token/jobs/{job_id}/results'
+    }), 202
+
+
+@app.route('/api/token/jobs/<job_id>', methods=['GET'])
+def api_token_job_status(job_id):
+    """토큰 생성 작업 진행 상황 조회 API (관리자 전용)"""
+    error = check_admin_key()
+    if error:
+        return error
+    
+    with token_jobs_cond:
+        prune_token_jobs()
+        job = token_jobs.get(job_id)
+        summary = summarize_job(job) if job else None
+    
+    if summary is None:
+        return jsonify({
+            'error': 'Not Found',
+            'message': '작업을 찾을 수 없습니다'
+        }), 404
+    return jsonify(summary), 200
+
+
+@app.route('/api/token/jobs/<job_id>/results', methods=['GET'])
+def api_token_job_results(job_id):
+    """
+    토큰 생성 작업 결과 NDJSON 스트리밍 API (관리자 전용)
+    작업이 끝날 때까지 생성되는 결과를 이어서 전송
+    
+    Query Parameters:
+        offset: 이 순번부터 전송 (연결이 끊긴 뒤 이어받기)
+    """
+    error = check_admin_key()
+    if error:
+        return error
+    
+    offset = request.args.get('offset', 0, type=int)
+    if offset < 0:
+        return jsonify({
+            'success': False,
+            'message': 'offset은 0 이상이어야 합니다'
+        }), 400
+    
+    with token_jobs_cond:
+        prune_token_jobs()
+        job = token_jobs.get(job_id)
+    if job is None:
+        return jsonify({
+            'error': 'Not Found',
+            'message': '작업을 찾을 수 없습니다'
+        }), 404
+    
+    def generate():
+        position = offset
+        while True:
+            with token_jobs_cond:
+                if position >= len(job['results']) and job['status'] not in ('done', 'failed'):
+                    token_jobs_cond.wait(timeout=5)
+                items = job['results'][position:]
+                finished = job['status'] in ('done', 'failed')
+                summary = summarize_job(job)
+            
+            for item in items:
+                yield json.dumps(item, ensure_ascii=False) + '\n'
+            position += len(items)
+            
+            if finished and position >= summary['done']:
+                yield json.dumps(summary, ensure_ascii=False) + '\n'
+                return
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """서버 상태 확인 엔드포인트"""
@@ -661,6 +2218,35 @@ def health_check():
     }), 200
 
 
+@app.route('/livez', methods=['GET'])
+def liveness_check():
+    """liveness probe - 프로세스가 요청을 처리할 수 있으면 항상 200 (Vault 상태와 무관)"""
+    return jsonify({'status': 'alive'}), 200
+
+
+@app.route('/readyz', methods=['GET'])
+def readiness_check():
+    """
+    readiness probe - 백그라운드 probe가 기록한 상태만 읽으므로 Vault를 호출하지 않음
+    
+    Vault가 정상이고 RENEWAL_TOKEN이 유효하며, 두 결과가 READINESS_STALE_AFTER초 이내일 때 200
+    """
+    now = time.time()
+    with readiness_lock:
+        state = dict(readiness_state)
+    
+    vault_ready = state['vault_ok'] and now - state['vault_checked_at'] <= READINESS_STALE_AFTER
+    token_ready = state['token_ok'] and now - state['token_checked_at'] <= READINESS_STALE_AFTER
+    ready = vault_ready and token_ready
+    
+    return jsonify({
+        'status': 'ready' if ready else 'not ready',
+        'vault': vault_ready,
+        'renewal_token': token_ready,
+        'renewal_token_ttl': state['token_ttl']
+    }), 200 if ready else 503
+
+
 @app.route('/api/data', methods=['GET'])
 def get_data():
     """
@@ -679,12 +2265,19 @@ def get_data():
     is_valid, token_info = verify_token(token)
     
     if not is_valid:
+        record_usage(request.remote_addr or 'unknown')
         logger.warning("API - 유효하지 않은 토큰으로 접근 시도")
         return jsonify({
             'error': 'Invalid token',
             'message': '토큰이 유효하지 않거나 만료되었습니다'
         }), 403
     
+    record_usage(
+        request.remote_addr or 'unknown',
+        token_info['data'].get('accessor') or hash_token(token)[:24],
+        token_info['data'].get('display_name', 'unknown')
+    )
+    
     logger.info(f"API 호출 성공 - 사용자: {token_info['data'].get('display_name', 'unknown')}")
     
     return jsonify({
@@ -699,6 +2292,212 @@ def get_data():
     }), 200
 
 
+@app.route('/api/token/revoke-batch', methods=['POST'])
+def api_revoke_batch():
+    """
+    토큰 일괄 폐기 API (관리자 전용), 진행 상황을 NDJSON으로 스트리밍
+    
+    Request Body:
+        {
+            "tokens": ["CAESI...", ...],
+            "accessors": ["BRCnmeVd...", ...],
+            "selector": {
+                "display_name_prefix": "billing",
+                "permissions": ["delete"]
+            }
+        }
+    """
+    error = check_admin_key()
+    if error:
+        return error
+    
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        data = {}
+    tokens = data.get('tokens') or []
+    accessors = data.get('accessors') or []
+    selector = data.get('selector') or {}
+    
+    def is_string_list(value):
+        return isinstance(value, list) and all(isinstance(v, str) and v for v in value)
+    
+    if not is_string_list(tokens) or not is_string_list(accessors):
+        return jsonify({
+            'success': False,
+            'message': 'tokens와 accessors는 문자열 목록이어야 합니다'
+        }), 400
+    if not isinstance(selector, dict):
+        return jsonify({
+            'success': False,
+            'message': 'selector는 객체여야 합니다'
+        }), 400
+    
+    name_prefix = selector.get('display_name_prefix', '')
+    if not isinstance(name_prefix, str) or not is_string_list(selector.get('permissions') or []):
+        return jsonify({
+            'success': False,
+            'message': 'selector.display_name_prefix는 문자열, selector.permissions는 문자열 목록이어야 합니다'
+        }), 400
+    
+    if selector and not name_prefix:
+        return jsonify({
+            'success': False,
+            'message': 'selector에는 display_name_prefix가 필요합니다'
+        }), 400
+    if not (tokens or accessors or selector):
+        return jsonify({
+            'success': False,
+            'message': 'tokens, accessors, selector 중 하나는 필수입니다'
+        }), 400
+    
+    # 서버 자체 토큰(RENEWAL_TOKEN)은 어떤 경로로도 폐기하지 않음
+    with token_lock:
+        own_token = current_token
+    own_info = get_token_info(own_token)
+    if own_info is None:
+        return jsonify({
+            'error': 'Vault Error',
+            'message': 'Vault에서 서버 토큰 정보를 가져올 수 없습니다'
+        }), 502
+    own_accessor = own_info.get('accessor')
+    own_error = '서버 자체 토큰은 폐기할 수 없습니다'
+    
+    # selector는 이 서비스가 발급한 토큰(토큰 인덱스)만 대상으로 하고, 현재 조건은 Vault에서 다시 확인
+    selected = []
+    if selector:
+        with token_index_lock:
+            selected = sorted(a for a in token_index if a != own_accessor)
+    
+    logger.warning(
+        f"API - 토큰 일괄 폐기 요청: tokens={len(tokens)}, accessors={len(accessors)}, selector={selector}"
+    )
+    
+    def iter_targets():
+        for token in tokens:
+            if attach_vault_prefix(token) == own_token:
+                yield 'error', own_accessor, own_error
+                continue
+            yield 'token', token
+        for accessor in accessors:
+            if accessor == own_accessor:
+                yield 'error', accessor, own_error
+                continue
+            yield 'accessor', accessor
+        if selector:
+            for record in iter_token_inventory(selected, name_prefix, selector.get('permissions') or ()):
+                if 'error' in record:
+                    # 조회에 실패한 토큰은 조건 일치 여부를 알 수 없으므로 실패로 보고
+                    yield 'error', record['accessor'], f"lookup 실패: {record['error']}"
+                elif 'accessor' in record:
+                    yield 'accessor', record['accessor']
+    
+    def generate():
+        for progress in iter_revocations(iter_targets()):
+            yield json.dumps(progress, ensure_ascii=False) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
+@app.route('/api/admin/usage', methods=['GET'])
+def usage_analytics():
+    """
+    /api/data 사용량 추정치 조회 (관리자 전용)
+    현재 집계 구간과 직전 구간의 상위 토큰/클라이언트, 고유 토큰/클라이언트 수 반환
+    """
+    error = check_admin_key()
+    if error:
+        return error
+    
+    with usage_lock:
+        rotate_usage_windows(time.time())
+        current = summarize_usage_window(usage_window)
+        previous = summarize_usage_window(previous_usage_window)
+    
+    return jsonify({
+        'enabled': USAGE_ANALYTICS,
+        'window_seconds': USAGE_WINDOW,
+        'current': current,
+        'previous': previous
+    }), 200
+
+
+@app.route('/api/admin/index', methods=['GET'])
+def query_issued_tokens():
+    """
+    이 서버가 발급한 토큰을 로컬 인덱스에서 조회 (관리자 전용, Vault 호출 없음)
+    
+    Query Parameters:
+        name_prefix: display_name 접두사 (예: billing-)
+        permissions: 쉼표로 구분한 권한 목록, 모두 가진 토큰만 반환
+    """
+    error = check_admin_key()
+    if error:
+        return error
+    
+    name_prefix = request.args.get('name_prefix', '')
+    permissions = [p for p in request.args.get('permissions', '').split(',') if p]
+    
+    unknown = [p for p in permissions if p not in PERMISSION_BITS]
+    if unknown:
+        return jsonify({
+            'success': False,
+            'message': f'알 수 없는 권한: {", ".join(unknown)}'
+        }), 400
+    
+    tokens = query_token_index(name_prefix, permissions)
+    return jsonify({'count': len(tokens), 'tokens': tokens}), 200
+
+
+@app.route('/api/admin/tokens', methods=['GET'])
+def export_token_inventory():
+    """
+    토큰 인벤토리 NDJSON 스트리밍 API (관리자 전용)
+    
+    Query Parameters:
+        name_prefix: display_name 접두사 필터
+        permissions: 쉼표로 구분한 권한 목록 (예: read,delete), 모두 가진 토큰만 반환
+        cursor: 이전 응답의 next_cursor (이어받기)
+        limit: 최대 반환 건수 (기본: 제한 없음)
+    """
+    error = check_admin_key()
+    if error:
+        return error
+    
+    name_prefix = request.args.get('name_prefix', '')
+    permissions = [p for p in request.args.get('permissions', '').split(',') if p]
+    cursor = request.args.get('cursor', '')
+    limit = request.args.get('limit', 0, type=int)
+    
+    # Vault 전체 조회 전에 요청 오류를 먼저 확인
+    unknown = [p for p in permissions if p not in PERMISSION_BITS]
+    if unknown:
+        return jsonify({
+            'success': False,
+            'message': f'알 수 없는 권한: {", ".join(unknown)}'
+        }), 400
+    if limit < 0:
+        return jsonify({
+            'success': False,
+            'message': 'limit은 0 이상이어야 합니다'
+        }), 400
+    
+    accessors = list_token_accessors()
+    if accessors is None:
+        return jsonify({
+            'error': 'Vault Error',
+            'message': 'Vault에서 토큰 accessor 목록을 가져올 수 없습니다'
+        }), 502
+    accessors.sort()
+    
+    logger.info(f"API - 토큰 인벤토리 조회: 전체 {len(accessors)}건, name_prefix={name_prefix}, permissions={permissions}")
+    
+    def generate():
+        for record in iter_token_inventory(accessors, name_prefix, permissions, cursor, limit):
+            yield json.dumps(record, ensure_ascii=False) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
 @app.errorhandler(404)
 def not_found(error):
     """404 에러 핸들러"""
@@ -719,24 +2518,50 @@ def internal_error(error):
 
 
 if __name__ == '__main__':
-    # Vault 서버 연결 확인
-    try:
-        response = requests.get(f'{VAULT_ADDR}/v1/sys/health', timeout=5)
-        logger.info(f"Vault 서버 연결 확인 완료: {VAULT_ADDR}")
-    except Exception as e:
-        logger.error(f"Vault 서버 연결 실패: {e}")
-        logger.warning("서버를 시작하지만 Vault 연결이 필요합니다")
-    
-    # RENEWAL_TOKEN 유효성 확인
-    token_info = get_token_info(RENEWAL_TOKEN)
-    if token_info:
-        logger.info(f"RENEWAL_TOKEN 유효성 확인 완료")
-        logger.info(f"   - Display Name: {token_info.get('display_name', 'N/A')}")
-        logger.info(f"   - TTL: {token_info.get('ttl', 0)}초")
-        logger.info(f"   - Creation TTL: {token_info.get('creation_ttl', 0)}초")
-    else:
-        logger.error("RENEWAL_TOKEN이 유효하지 않습니다!")
-        sys.exit(1)
+    snapshot_enabled = VERIFY_CACHE_TTL > 0 and VERIFY_CACHE_SNAPSHOT_PATH
+    if snapshot_enabled and not VERIFY_CACHE_SNAPSHOT_KEY:
+        logger.warning("VERIFY_CACHE_SNAPSHOT_KEY가 없어 검증 캐시 스냅샷을 사용하지 않습니다")
+        snapshot_enabled = False
+    
+    if JOB_CHECKPOINT_PATH and not JOB_CHECKPOINT_KEY:
+        logger.warning("JOB_CHECKPOINT_KEY가 없어 토큰 생성 작업을 체크포인트하지 않습니다")
+    
+    # Vault 확인보다 먼저 포트를 열어 /livez가 바로 응답하도록 함 (Vault 상태는 /readyz로만 노출)
+    server = make_server('0.0.0.0', 5001, app, threaded=True)
+    
+    # 검증 캐시 스냅샷/토큰 인덱스 복원 (로컬 파일, 요청 처리 전에 완료)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        snapshot_future = executor.submit(load_verify_cache_snapshot) if snapshot_enabled else None
+        index_future = executor.submit(load_token_index)
+    
+    # 검증 캐시 스냅샷 저장 스레드 시작
+    if snapshot_enabled:
+        logger.info(f"검증 캐시 스냅샷 복원: {snapshot_future.result()}건")
+        
+        # 종료 시(SIGTERM 포함) 마지막 스냅샷 저장
+        atexit.register(save_verify_cache_snapshot)
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+        
+        snapshot_thread = threading.Thread(target=verify_cache_snapshot_worker, daemon=True)
+        snapshot_thread.start()
+        logger.info("검증 캐시 스냅샷 스레드 시작됨")
+    
+    # 토큰 인덱스 정리/압축 스레드 시작 (메모리 전용 모드에서도 만료 항목 제거)
+    if TOKEN_INDEX_PATH:
+        logger.info(f"토큰 인덱스 복원: {index_future.result()}건")
+    
+    index_thread = threading.Thread(target=token_index_compaction_worker, daemon=True)
+    index_thread.start()
+    logger.info("토큰 인덱스 압축 스레드 시작됨")
+    
+    # RENEWAL_TOKEN 확인 및 토큰 생성 작업 복원 스레드 시작
+    startup_thread = threading.Thread(target=startup_token_check, daemon=True)
+    startup_thread.start()
+    
+    # readiness probe 백그라운드 스레드 시작
+    probe_thread = threading.Thread(target=readiness_probe_worker, daemon=True)
+    probe_thread.start()
+    logger.info("readiness probe 스레드 시작됨")
     
     # 토큰 갱신 백그라운드 스레드 시작
     renewal_thread = threading.Thread(target=token_renewal_worker, daemon=True)
@@ -746,4 +2571,4 @@ if __name__ == '__main__':
     # Flask 서버 시작
     logger.info("API 서버 시작 - http://0.0.0.0:5001")
     logger.info("UI 접속 - http://localhost:5001")
-    app.run(host='0.0.0.0', port=5001, debug=False, threaded=True)
\ No newline at end of file
+    server.serve_forever()
\ No newline at end of file
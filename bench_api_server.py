@@ -0,0 +1,316 @@
+"""
+api_server 핫패스 마이크로벤치마크
+
+Vault 없이 실행 가능하도록 requests의 transport adapter를 가짜 Vault로 교체하고
+Flask test client로 요청을 처리하여 호출당 비용을 측정합니다.
+
+측정 항목:
+- ops/sec (단일 스레드, 멀티 스레드)
+- 호출당 최대 메모리 할당량 (tracemalloc)
+- token_lock 경합 횟수와 대기 시간
+
+사용법:
+    python bench_api_server.py                    # 측정 후 기준값과 비교
+    python bench_api_server.py --save-baseline    # 측정 결과를 기준값으로 저장
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from unittest import mock
+
+import requests
+from requests.adapters import BaseAdapter
+
+import api_server
+
+BASELINE_PATH = "bench_baseline.json"
+
+# 기본 설정
+DEFAULT_OPS = 2000
+DEFAULT_THREADS = 8
+# 반복 측정 후 가장 좋은 값 사용 (일시적인 잡음 제거)
+DEFAULT_REPEAT = 3
+# 기준값 대비 ops/sec가 이 비율 이상 떨어지면 회귀로 판단
+DEFAULT_TOLERANCE = 0.2
+# tracemalloc 측정 호출 수 (추적 중에는 느려지므로 따로 적게 실행)
+ALLOC_SAMPLES = 50
+
+TOKEN = "hvs.CAESIBenchmarkTokenValue0123456789"
+
+LOOKUP_DATA = {
+    "accessor": "BenchAccessor0123456789",
+    "creation_time": 1768436695,
+    "creation_ttl": 86400,
+    "display_name": "token-bench",
+    "ttl": 86000,
+    "meta": {"create": "true", "read": "true"},
+    "policies": ["default"],
+}
+
+PERMISSIONS = {"create": True, "read": True, "update": False, "delete": False, "list": True}
+
+
+class FakeVaultAdapter(BaseAdapter):
+    """경로별로 미리 정해둔 Vault 응답을 네트워크 없이 반환하는 transport adapter"""
+
+    def __init__(self):
+        super().__init__()
+        self.created = 0
+        self.lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        path = request.path_url.split("?")[0]
+
+        if path == "/v1/auth/token/create-orphan":
+            with self.lock:
+                self.created += 1
+                n = self.created
+            body = {"auth": {
+                "client_token": f"hvs.CAESIBench{n:012d}",
+                "accessor": f"BenchAccessor{n:012d}",
+                "lease_duration": 86400,
+            }}
+        elif path in ("/v1/auth/token/lookup", "/v1/auth/token/lookup-self"):
+            body = {"data": LOOKUP_DATA}
+        else:
+            body = {}
+
+        response = requests.Response()
+        response.status_code = 200
+        response._content = json.dumps(body).encode()
+        response.headers["Content-Type"] = "application/json"
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+class InstrumentedLock:
+    """token_lock 대체용 - 경합 횟수와 대기 시간을 기록하는 Lock"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.acquires = 0
+        self.contended = 0
+        self.wait_seconds = 0.0
+
+    def acquire(self, blocking=True, timeout=-1):
+        if self.lock.acquire(blocking=False):
+            self.acquires += 1
+            return True
+        start = time.perf_counter()
+        acquired = self.lock.acquire(blocking, timeout)
+        if acquired:
+            # 카운터 갱신은 lock을 보유한 상태에서 수행
+            self.acquires += 1
+            self.contended += 1
+            self.wait_seconds += time.perf_counter() - start
+        return acquired
+
+    def release(self):
+        self.lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def build_cases():
+    """
+    (이름, 호출 함수, api_server 설정 override) 목록
+    각 함수는 한 번 호출에 한 번의 작업 수행
+    """
+    client = api_server.app.test_client()
+    data_headers = {"Token-Header": api_server.strip_vault_prefix(TOKEN)}
+
+    def get_data():
+        response = client.get("/api/data", headers=data_headers)
+        assert response.status_code == 200, response.status_code
+
+    def create_via_api():
+        response = client.post("/api/token/create", json={"name": "bench", "permissions": PERMISSIONS})
+        assert response.status_code == 200, response.status_code
+
+    def render_index():
+        response = client.get("/")
+        assert response.status_code == 200, response.status_code
+
+    return [
+        ("strip_vault_prefix", lambda: api_server.strip_vault_prefix(TOKEN), {}),
+        ("attach_vault_prefix", lambda: api_server.attach_vault_prefix(TOKEN[4:]), {}),
+        ("record_usage", lambda: api_server.record_usage("10.0.0.1", LOOKUP_DATA["accessor"], "token-bench"), {}),
+        ("verify_token", lambda: api_server.verify_token(TOKEN), {}),
+        ("verify_token_cached", lambda: api_server.verify_token(TOKEN), {"VERIFY_CACHE_TTL": 60}),
+        ("create_vault_token", lambda: api_server.create_vault_token("bench", PERMISSIONS), {}),
+        ("get_data", get_data, {}),
+        ("get_data_no_usage", get_data, {"USAGE_ANALYTICS": False}),
+        ("api_create_token", create_via_api, {}),
+        ("index", render_index, {}),
+    ]
+
+
+# 벤치마크 중 디스크에 인덱스/체크포인트/스냅샷을 쓰지 않도록 경로 비활성화
+PERSISTENCE_OVERRIDES = {
+    "TOKEN_INDEX_PATH": "",
+    "JOB_CHECKPOINT_PATH": "",
+    "VERIFY_CACHE_SNAPSHOT_PATH": "",
+}
+
+
+def reset_state():
+    """항목 간 결과가 섞이지 않도록 api_server의 메모리 저장소 초기화"""
+    with api_server.verify_cache_lock:
+        api_server.verify_cache.clear()
+    with api_server.idempotency_lock:
+        api_server.idempotency_store.clear()
+    with api_server.token_index_lock:
+        api_server.token_index.clear()
+        api_server.token_index_names.clear()
+        api_server.token_index_hashes.clear()
+        for accessors in api_server.token_index_by_permission.values():
+            accessors.clear()
+
+
+def run_timed(func, ops, threads):
+    """
+    func를 ops번 호출하는 데 걸린 시간으로 ops/sec 계산
+
+    Returns:
+        tuple: (ops/sec, token_lock 통계 dict)
+    """
+    lock = InstrumentedLock()
+    per_thread = max(1, ops // threads)
+
+    def worker():
+        for _ in range(per_thread):
+            func()
+
+    with mock.patch.object(api_server, "token_lock", lock):
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        start = time.perf_counter()
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+        elapsed = time.perf_counter() - start
+
+    return per_thread * threads / elapsed, {
+        "acquires": lock.acquires,
+        "contended": lock.contended,
+        "wait_ms": round(lock.wait_seconds * 1000, 3),
+    }
+
+
+def measure_alloc(func):
+    """호출당 최대 메모리 할당량(bytes) 평균"""
+    func()  # 지연 초기화 비용 제외
+    tracemalloc.start()
+    total = 0
+    for _ in range(ALLOC_SAMPLES):
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+        total += peak - before
+    tracemalloc.stop()
+    return total // ALLOC_SAMPLES
+
+
+def run_benchmarks(ops, threads, repeat):
+    adapter = FakeVaultAdapter()
+    results = {}
+
+    # 요청마다 남는 INFO 로그가 측정값을 왜곡하지 않도록 경고 이상만 출력
+    api_server.logger.setLevel(logging.WARNING)
+
+    with mock.patch.object(requests.Session, "get_adapter", lambda self, url: adapter), \
+            mock.patch.dict(api_server.__dict__, PERSISTENCE_OVERRIDES):
+        for name, func, overrides in build_cases():
+            reset_state()
+            with mock.patch.dict(api_server.__dict__, overrides):
+                func()  # 워밍업
+                single = max(run_timed(func, ops, 1)[0] for _ in range(repeat))
+                multi, lock_stats = max((run_timed(func, ops, threads) for _ in range(repeat)), key=lambda r: r[0])
+                alloc = measure_alloc(func)
+
+            results[name] = {
+                "ops_per_sec": round(single, 1),
+                "ops_per_sec_mt": round(multi, 1),
+                "alloc_peak_bytes": alloc,
+                "token_lock": lock_stats,
+            }
+            print(
+                f"{name:<22} {single:>12,.0f} ops/s  {multi:>12,.0f} ops/s ({threads}T)  "
+                f"{results[name]['alloc_peak_bytes']:>8,d} B/op  "
+                f"lock contended {lock_stats['contended']}/{lock_stats['acquires']} "
+                f"wait {lock_stats['wait_ms']}ms"
+            )
+
+    return results
+
+
+def compare_with_baseline(results, baseline, tolerance):
+    """
+    기준값 대비 ops/sec 하락률이 tolerance를 넘는 항목 출력
+
+    Returns:
+        bool: 회귀가 없으면 True
+    """
+    ok = True
+    print(f"\n=== 기준값 비교 (허용 하락률 {tolerance:.0%}) ===")
+    for name, current in results.items():
+        base = baseline.get(name)
+        if not base:
+            print(f"[NEW ] {name}")
+            continue
+        for key in ("ops_per_sec", "ops_per_sec_mt"):
+            change = current[key] / base[key] - 1
+            status = "OK  "
+            if change < -tolerance:
+                status = "FAIL"
+                ok = False
+            print(f"[{status}] {name:<22} {key:<15} {base[key]:>12,.0f} -> {current[key]:>12,.0f} ({change:+.1%})")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="api_server 핫패스 마이크로벤치마크")
+    parser.add_argument("--ops", type=int, default=DEFAULT_OPS, help="항목별 호출 횟수")
+    parser.add_argument("--threads", type=int, default=DEFAULT_THREADS, help="멀티 스레드 측정 스레드 수")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="반복 측정 횟수 (최고값 사용)")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="기준값 파일 경로")
+    parser.add_argument("--save-baseline", action="store_true", help="측정 결과를 기준값으로 저장")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="허용 하락률 (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    print(f"=== 벤치마크 시작 (ops={args.ops}, threads={args.threads}) ===")
+    results = run_benchmarks(args.ops, args.threads, args.repeat)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n기준값 저장: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\n기준값 파일이 없습니다: {args.baseline} (--save-baseline으로 생성)")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    return 0 if compare_with_baseline(results, baseline, args.tolerance) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())